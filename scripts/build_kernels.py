@@ -0,0 +1,32 @@
+# Ahead-of-time build of the Numba kernels used by preprocess.py.
+# Run once:  python scripts/build_kernels.py  → writes preprocess_kernels.*.so next to this file.
+from pathlib import Path
+
+from numba.pycc import CC
+
+cc = CC("preprocess_kernels")
+cc.output_dir = str(Path(__file__).resolve().parent)
+
+
+@cc.export("iqr_cap_all", "void(f8[:, :], f8[:], f8[:], f8[:, :], i8[:])")
+def iqr_cap_all(block, los, his, out, counts):
+    # Same loop as preprocess._iqr_cap_all_jit; pycc has no parallel=True, so columns run serially.
+    for c in range(block.shape[0]):
+        lo = los[c]
+        hi = his[c]
+        n = 0
+        for i in range(block.shape[1]):
+            v = block[c, i]
+            if v < lo:
+                out[c, i] = lo
+                n += 1
+            elif v > hi:
+                out[c, i] = hi
+                n += 1
+            else:
+                out[c, i] = v
+        counts[c] = n
+
+
+if __name__ == "__main__":
+    cc.compile()
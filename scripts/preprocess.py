@@ -1,11 +1,29 @@
 import logging
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
+from pathlib import Path
 from typing import Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # fall back to the pandas parser
+    pa = None
+    pacsv = None
+
+try:
+    import bottleneck as bn
+except ImportError:  # NumPy's nanmedian is the fallback
+    bn = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # plain NumPy kernels below
+    njit = None
 
 # Configure logging
 logging.basicConfig(
@@ -15,38 +33,108 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-
-def load_data(file_path: str) -> pd.DataFrame:
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _iqr_cap_all_jit(block, los, his, out, counts):
+        # One thread per column (row of the block); NaNs fail both comparisons and pass through.
+        for c in prange(block.shape[0]):
+            lo = los[c]
+            hi = his[c]
+            n = 0
+            for i in range(block.shape[1]):
+                v = block[c, i]
+                if v < lo:
+                    out[c, i] = lo
+                    n += 1
+                elif v > hi:
+                    out[c, i] = hi
+                    n += 1
+                else:
+                    out[c, i] = v
+            counts[c] = n
+else:
+    def _iqr_cap_all_jit(block, los, his, out, counts):
+        lo = los[:, None]
+        hi = his[:, None]
+        counts[:] = ((block < lo) | (block > hi)).sum(axis=1)
+        np.clip(block, lo, hi, out=out)
+
+try:
+    # Precompiled by build_kernels.py – skips the JIT warm-up on the first call
+    from preprocess_kernels import iqr_cap_all as _iqr_cap_all
+except ImportError:
+    _iqr_cap_all = _iqr_cap_all_jit
+
+
+# Explicit schema for the raw CSV → saves memory & prevents surprises
+DTYPE_SPEC = {
+    "Customer ID": "int32",
+    "Age": "int8", # age 18–99 → int8 is enough
+    "Gender": "category",
+    "Item Purchased": "category",
+    "Category": "category",
+    "Purchase Amount (USD)": "int16", # 20–100 range
+    "Location": "category",
+    "Size": "category",
+    "Color": "category",
+    "Season": "category",
+    "Review Rating": "float32",
+    "Subscription Status": "category",
+    "Shipping Type": "category",
+    "Discount Applied": "category",
+    "Promo Code Used": "category",
+    "Previous Purchases": "int16",
+    "Payment Method": "category",
+    "Frequency of Purchases": "category"
+}
+
+
+# pandas' default NA strings, so both loader paths agree on what counts as missing
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+]
+
+
+def _arrow_schema() -> "pa.Schema":
+    # Translate DTYPE_SPEC into an Arrow schema (categories → dictionary-encoded strings).
+    arrow_types = {
+        "int8": pa.int8(),
+        "int16": pa.int16(),
+        "int32": pa.int32(),
+        "float32": pa.float32(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(col, arrow_types[dtype]) for col, dtype in DTYPE_SPEC.items()])
+
+
+def load_data(file_path: str, use_pyarrow: bool = True) -> pd.DataFrame:
     # Load CSV with better dtype inference and memory optimization.
     try:
-        # Use explicit dtypes where we know the schema → saves memory & prevents surprises
-        dtype_spec = {
-            "Customer ID": "int32",
-            "Age": "int8", # age 18–99 → int8 is enough
-            "Gender": "category",
-            "Item Purchased": "category",
-            "Category": "category",
-            "Purchase Amount (USD)": "int16", # 20–100 range
-            "Location": "category",
-            "Size": "category",
-            "Color": "category",
-            "Season": "category",
-            "Review Rating": "float32",
-            "Subscription Status": "category",
-            "Shipping Type": "category",
-            "Discount Applied": "category",
-            "Promo Code Used": "category",
-            "Previous Purchases": "int16",
-            "Payment Method": "category",
-            "Frequency of Purchases": "category"
-        }
-
-        df = pd.read_csv(
-            file_path,
-            dtype=dtype_spec,
-            parse_dates=False,  # no real dates in this dataset
-            low_memory=False
-        )
+        if use_pyarrow and pa is not None:
+            # Multi-threaded Arrow parser; dictionary columns arrive as pandas categoricals
+            table = pacsv.read_csv(
+                file_path,
+                convert_options=pacsv.ConvertOptions(
+                    column_types=_arrow_schema(),
+                    null_values=NA_VALUES,
+                    strings_can_be_null=True
+                )
+            )
+            df = table.to_pandas(self_destruct=True)
+            del table
+
+            # Arrow keeps categories in order of appearance – sort them like pandas does
+            # so category codes are identical on both paths
+            for col in df.select_dtypes(include="category").columns:
+                df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+        else:
+            df = pd.read_csv(
+                file_path,
+                dtype=DTYPE_SPEC,
+                parse_dates=False,  # no real dates in this dataset
+                low_memory=False
+            )
         logger.info(f"Loaded dataset with shape: {df.shape}")
         return df
 
@@ -58,28 +146,65 @@ def load_data(file_path: str) -> pd.DataFrame:
         raise
 
 
+def _drop_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    # Deduplicate in integer space: categoricals use their codes, other columns are factorized,
+    # and the per-column codes are folded into one int64 row key before a single hash pass.
+    if df.empty:
+        return df.copy()
+    key = np.zeros(len(df), dtype=np.int64)
+    key_size = 1
+    for _, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.array.codes.astype(np.int64) + 1  # NaN (-1) → 0
+        else:
+            codes = pd.factorize(series.to_numpy())[0].astype(np.int64) + 1
+        n_codes = int(codes.max()) + 1
+        if key_size * n_codes >= 2**62:
+            # Re-number the observed keys densely so the mixed-radix key cannot overflow
+            key, uniques = pd.factorize(key)
+            key = key.astype(np.int64)
+            key_size = len(uniques)
+        key = key * n_codes + codes
+        key_size *= n_codes
+    return df[~pd.Series(key).duplicated(keep="first").to_numpy()]
+
+
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     # Advanced cleaning with type-aware missing value handling.
     original_shape = df.shape
 
     # 1. Remove exact duplicates
-    df = df.drop_duplicates()
+    df = _drop_duplicates(df)
     logger.info(f"Removed {original_shape[0] - df.shape[0]} duplicate rows")
 
     # 2. Missing values – strategy per column type
-    missing_before = df.isna().sum().sum()
+    # One vectorized NaN count; columns without gaps are skipped entirely
+    miss = df.isna().sum()
+    missing_before = miss.sum()
+    cols_with_nan = miss[miss > 0].index
 
     # Numeric columns → median (robust to outliers)
-    num_cols = df.select_dtypes(include=[np.number]).columns
-    df[num_cols] = df[num_cols].fillna(df[num_cols].median())
+    num_cols = df.select_dtypes(include=[np.number]).columns.intersection(cols_with_nan)
+    if len(num_cols):
+        nanmedian = bn.nanmedian if bn is not None else np.nanmedian
+        medians = nanmedian(df[num_cols].to_numpy(dtype=np.float64), axis=0)
+        for col, median in zip(num_cols, medians):
+            df[col] = df[col].fillna(median)
 
     # Categorical columns → mode (most frequent)
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns
+    cat_cols = df.select_dtypes(include=["object", "category"]).columns.intersection(cols_with_nan)
     for col in cat_cols:
-        if df[col].isna().any():
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Mode straight from the integer codes – ties resolve to the first category, like mode()[0]
+            codes = df[col].cat.codes.to_numpy()
+            codes = codes[codes >= 0]
+            if codes.size == 0:
+                continue
+            mode_val = df[col].cat.categories[np.bincount(codes).argmax()]
+        else:
             mode_val = df[col].mode()[0]
-            df[col] = df[col].fillna(mode_val)
-            logger.debug(f"Filled {col} missing values with mode: {mode_val}")
+        df[col] = df[col].fillna(mode_val)
+        logger.debug(f"Filled {col} missing values with mode: {mode_val}")
 
     missing_after = df.isna().sum().sum()
     logger.info(f"Managed {missing_before - missing_after} missing values")
@@ -92,74 +217,128 @@ def detect_and_handle_outliers(
     columns: list[str],
     method: str = "iqr",
     threshold: float = 1.5,
-    action: str = "cap"
+    action: str = "cap",
+    inplace: bool = True
 ) -> pd.DataFrame:
     # Handle outliers in numeric columns using IQR or z-score.
-    df_out = df.copy()
-
+    # Capped columns are written as fresh arrays, so inplace only skips the full-frame copy.
+    df_out = df if inplace else df.copy()
+
+    columns = [col for col in columns if col in df_out.columns]
+    if method != "iqr" or not columns:
+        return df_out
+
+    if action == "cap":
+        # Capping one column never changes another's quartiles → cap all columns in one kernel call
+        block = np.vstack([df_out[col].to_numpy(dtype=np.float64) for col in columns])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns → NaN bounds, nothing capped
+            Q1, Q3 = np.nanquantile(block, [0.25, 0.75], axis=1)
+        IQR = Q3 - Q1
+        lower = Q1 - threshold * IQR
+        upper = Q3 + threshold * IQR
+
+        capped = np.empty_like(block)
+        counts = np.zeros(len(columns), dtype=np.int64)
+        _iqr_cap_all(block, lower, upper, capped, counts)
+
+        for i, col in enumerate(columns):
+            if counts[i] == 0:
+                continue
+            values = capped[i]
+            # Keep the original dtype: floats always, integers when the bounds landed on whole numbers
+            dtype = df_out[col].dtype
+            if np.issubdtype(dtype, np.floating):
+                values = values.astype(dtype)
+            elif np.issubdtype(dtype, np.integer) and np.array_equal(values, values.astype(dtype)):
+                values = values.astype(dtype)
+            df_out[col] = values
+            logger.info(f"{col}: capped/removed {counts[i]} outliers (method={method})")
+        return df_out
+
+    # Removal shrinks the frame, so later columns see the filtered data – keep it sequential
     for col in columns:
-        if col not in df_out.columns:
+        values = df_out[col].to_numpy(dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        if valid.size == 0:
             continue
 
-        series = df_out[col].dropna()
-
-        if method == "iqr":
-            Q1 = series.quantile(0.25)
-            Q3 = series.quantile(0.75)
-            IQR = Q3 - Q1
-            lower = Q1 - threshold * IQR
-            upper = Q3 + threshold * IQR
+        Q1, Q3 = np.quantile(valid, [0.25, 0.75])
+        IQR = Q3 - Q1
+        lower = Q1 - threshold * IQR
+        upper = Q3 + threshold * IQR
 
-            mask = (series < lower) | (series > upper)
-            outlier_count = mask.sum()
+        mask = (values < lower) | (values > upper)
+        outlier_count = int(np.count_nonzero(mask))
 
-            if outlier_count > 0:
-                if action == "cap":
-                    df_out.loc[df_out[col] < lower, col] = lower
-                    df_out.loc[df_out[col] > upper, col] = upper
-                elif action == "remove":
-                    df_out = df_out[~mask]
-                logger.info(f"{col}: capped/removed {outlier_count} outliers (method={method})")
+        if outlier_count > 0:
+            if action == "remove":
+                df_out = df_out[~mask]
+            logger.info(f"{col}: capped/removed {outlier_count} outliers (method={method})")
 
     return df_out
 
 
-def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
+def feature_engineering(df: pd.DataFrame, inplace: bool = True) -> pd.DataFrame:
     # Create richer features suitable for EDA and modeling.
-    df = df.copy()
+    # Every feature is computed from the untouched input first, then attached in one step.
+    new_cols = {}
 
     # 1. Age grouping (more granular + ordinal encoding option)
     if "Age" in df.columns:
-        bins = [0, 18, 25, 35, 45, 55, 65, 100]
+        # [0, 18), [18, 25), ..., [65, 100) → searchsorted on the inner edges gives the codes
+        edges = np.array([18, 25, 35, 45, 55, 65], dtype=np.int16)
         labels = ["<18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
-        df["Age_Group"] = pd.cut(df["Age"], bins=bins, labels=labels, right=False)
+        age = df["Age"].to_numpy(dtype=np.float64)
+        codes = np.searchsorted(edges, age, side="right").astype(np.int8)
+        codes[np.isnan(age) | (age < 0) | (age >= 100)] = -1
+        new_cols["Age_Group"] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
         # Optional: ordinal encoding
-        df["Age_Group_Ordinal"] = df["Age_Group"].cat.codes
+        new_cols["Age_Group_Ordinal"] = codes
 
     # 2. Purchase value categories
     if "Purchase Amount (USD)" in df.columns:
-        bins = [-np.inf, 30, 50, 75, 100, np.inf]
+        # (-inf, 30], (30, 50], (50, 75], (75, 100], (100, inf)
+        edges = np.array([30, 50, 75, 100], dtype=np.float64)
         labels = ["Very Low", "Low", "Medium", "High", "Very High"]
-        df["Purchase_Category"] = pd.cut(
-            df["Purchase Amount (USD)"],
-            bins=bins,
-            labels=labels
-        )
+        amount = df["Purchase Amount (USD)"].to_numpy(dtype=np.float64)
+        codes = np.searchsorted(edges, amount, side="left").astype(np.int8)
+        codes[np.isnan(amount)] = -1
+        new_cols["Purchase_Category"] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
 
     # 3. Discount & Promo interaction
     if all(col in df.columns for col in ["Discount Applied", "Promo Code Used"]):
-        df["Discount_or_Promo"] = (
+        new_cols["Discount_or_Promo"] = (
             (df["Discount Applied"] == "Yes") |
             (df["Promo Code Used"] == "Yes")
         ).map({True: "Yes", False: "No"}).astype("category")
 
     # 4. Loyalty / recency proxy
     if "Previous Purchases" in df.columns:
-        df["Is_Repeat_Customer"] = (df["Previous Purchases"] >= 10).astype("int8")
+        new_cols["Is_Repeat_Customer"] = (df["Previous Purchases"] >= 10).astype("int8")
 
     # 5. Season + Category interaction (popular combos)
     if all(col in df.columns for col in ["Season", "Category"]):
-        df["Season_Category"] = df["Season"].astype(str) + "_" + df["Category"].astype(str)
+        # Combine integer codes instead of concatenating strings row by row
+        season = df["Season"].astype("category").cat
+        category = df["Category"].astype("category").cat
+        s_codes = season.codes.to_numpy(dtype=np.int32)
+        c_codes = category.codes.to_numpy(dtype=np.int32)
+        codes = s_codes * len(category.categories) + c_codes
+        labels = [f"{s}_{c}" for s in season.categories for c in category.categories]
+        # Different pairs can join to the same label ("A_B" + "C" vs "A" + "B_C") → collapse them
+        uniq, remap = np.unique(labels, return_inverse=True)
+        codes = np.where((s_codes < 0) | (c_codes < 0), -1, remap[codes])
+        new_cols["Season_Category"] = pd.Categorical.from_codes(codes, categories=uniq)
+
+    if inplace:
+        # assign() copies the whole frame first – one concat without copying the existing blocks
+        stale = [name for name in new_cols if name in df.columns]
+        if stale:
+            df = df.drop(columns=stale)
+        df = pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1, copy=False)
+    else:
+        df = df.assign(**new_cols)
 
     logger.info("Feature engineering completed. New columns added.")
     return df
@@ -179,17 +358,21 @@ def encode_categorical(
     if cols_label:
         for col in cols_label:
             if col in df_enc.columns:
-                le = LabelEncoder()
-                df_enc[col] = le.fit_transform(df_enc[col].astype(str))
-                encoders[col] = le
+                # Category codes already are a label encoding – no string cast or re-sort
+                s = df_enc[col]
+                if not isinstance(s.dtype, pd.CategoricalDtype):
+                    s = s.astype("category")
+                df_enc[col] = s.cat.codes.astype(np.int16)
+                encoders[col] = dict(enumerate(s.cat.categories))
 
     # One-Hot Encoding
     if cols_onehot:
-        ohe = OneHotEncoder(sparse_output=False, drop="first" if drop_first else None,
+        # Keep the indicator matrix sparse end to end → SparseArray columns, no dense float64 block
+        ohe = OneHotEncoder(sparse_output=True, drop="first" if drop_first else None,
                             handle_unknown="ignore")
         ohe_data = ohe.fit_transform(df_enc[cols_onehot])
         ohe_cols = ohe.get_feature_names_out(cols_onehot)
-        ohe_df = pd.DataFrame(ohe_data, columns=ohe_cols, index=df_enc.index)
+        ohe_df = pd.DataFrame.sparse.from_spmatrix(ohe_data, index=df_enc.index, columns=ohe_cols)
         df_enc = pd.concat([df_enc.drop(columns=cols_onehot), ohe_df], axis=1)
         encoders["onehot"] = ohe
 
@@ -202,21 +385,41 @@ def preprocess_pipeline(
     outlier_method: str = "iqr",
     encode_categoricals: bool = False,
     onehot_cols: Optional[list] = None,
-    label_cols: Optional[list] = None
+    label_cols: Optional[list] = None,
+    use_cache: bool = True
 ) -> pd.DataFrame:
     # Full production-ready preprocessing pipeline.
     logger.info("Starting preprocessing pipeline...")
 
-    df = load_data(file_path)
-    df = clean_data(df)
-
-    # outlier handling
-    if handle_outliers:
-        numeric_to_check = ["Purchase Amount (USD)", "Previous Purchases", "Age", "Review Rating"]
-        present_cols = [c for c in numeric_to_check if c in df.columns]
-        df = detect_and_handle_outliers(df, present_cols, method=outlier_method)
-
-    df = feature_engineering(df)
+    # Parquet cache of the cleaned + engineered frame, one file per outlier setting.
+    # Reused while it is newer than the source CSV; encoding always runs fresh.
+    cache = None
+    if use_cache and pa is not None:
+        source = Path(file_path)
+        tag = outlier_method if handle_outliers else "raw"
+        cache = source.with_name(f"{source.stem}.{tag}.processed.parquet")
+
+    if cache is not None and cache.exists() and cache.stat().st_mtime >= source.stat().st_mtime:
+        df = pd.read_parquet(cache, engine="pyarrow")
+        logger.info(f"Loaded cached preprocessed data from {cache}")
+    else:
+        df = load_data(file_path)
+        df = clean_data(df)
+
+        # outlier handling
+        if handle_outliers:
+            numeric_to_check = ["Purchase Amount (USD)", "Previous Purchases", "Age", "Review Rating"]
+            present_cols = [c for c in numeric_to_check if c in df.columns]
+            df = detect_and_handle_outliers(df, present_cols, method=outlier_method)
+
+        df = feature_engineering(df)
+
+        if cache is not None:
+            try:
+                df.to_parquet(cache, engine="pyarrow", compression="zstd", use_dictionary=True)
+                logger.info(f"Cached preprocessed data to {cache}")
+            except OSError as e:
+                logger.warning(f"Could not write cache {cache}: {e}")
 
     if encode_categoricals:
         df, _ = encode_categorical(
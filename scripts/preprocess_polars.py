@@ -0,0 +1,225 @@
+import logging
+from typing import Union
+
+import pandas as pd
+import polars as pl
+
+from preprocess import DTYPE_SPEC, NA_VALUES
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+POLARS_DTYPES = {
+    "int8": pl.Int8,
+    "int16": pl.Int16,
+    "int32": pl.Int32,
+    "float32": pl.Float32,
+    "category": pl.Categorical,
+}
+
+AGE_BREAKS = [18, 25, 35, 45, 55, 65]
+AGE_LABELS = ["<18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+PURCHASE_BREAKS = [30, 50, 75, 100]
+PURCHASE_LABELS = ["Very Low", "Low", "Medium", "High", "Very High"]
+
+
+def scan_data(file_path: str) -> pl.LazyFrame:
+    # Lazy CSV scan – nothing is read until the query is collected.
+    dtypes = {col: POLARS_DTYPES[dtype] for col, dtype in DTYPE_SPEC.items()}
+    return pl.scan_csv(
+        file_path,
+        schema_overrides=dtypes,
+        null_values=NA_VALUES,
+        missing_utf8_is_empty_string=False
+    )
+
+
+def clean_data(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # Same strategy as the pandas version: drop duplicates, median / mode imputation.
+    schema = lf.schema
+    num_cols = [c for c, t in schema.items() if t.is_numeric()]
+    cat_cols = [c for c, t in schema.items() if t in (pl.Categorical, pl.Utf8)]
+
+    # Only columns with gaps are imputed; integer columns with gaps become Float64,
+    # matching the float64 column pandas holds them in
+    null_counts = lf.select(pl.col(num_cols).null_count()).collect().row(0, named=True) if num_cols else {}
+    num_exprs = []
+    for c in num_cols:
+        if null_counts[c] == 0:
+            continue
+        target = pl.Float64 if schema[c].is_integer() else schema[c]
+        num_exprs.append(pl.col(c).cast(target).fill_null(pl.col(c).median()).cast(target))
+
+    return lf.unique(maintain_order=True).with_columns(
+        num_exprs
+        # mode() returns ties in no fixed order – take the smallest, like pandas' mode()[0]
+        + [
+            pl.col(c).fill_null(pl.col(c).cast(pl.Utf8).drop_nulls().mode().min()).cast(schema[c])
+            for c in cat_cols
+        ]
+    )
+
+
+def _iqr_bounds(lf: pl.LazyFrame, columns: list[str], threshold: float) -> dict:
+    # Eager pass over the quartiles → {col: (lower, upper)} as plain floats (None for all-null columns).
+    stats = lf.select(
+        [pl.col(c).quantile(0.25, interpolation="linear").alias(f"{c}__q1") for c in columns]
+        + [pl.col(c).quantile(0.75, interpolation="linear").alias(f"{c}__q3") for c in columns]
+    ).collect().row(0, named=True)
+    bounds = {}
+    for c in columns:
+        q1, q3 = stats[f"{c}__q1"], stats[f"{c}__q3"]
+        if q1 is None or q3 is None:
+            continue
+        iqr = q3 - q1
+        bounds[c] = (q1 - threshold * iqr, q3 + threshold * iqr)
+    return bounds
+
+
+def detect_and_handle_outliers(
+    lf: pl.LazyFrame,
+    columns: list[str],
+    method: str = "iqr",
+    threshold: float = 1.5,
+    action: str = "cap"
+) -> pl.LazyFrame:
+    # Bounds and outlier counts are collected eagerly so output dtypes can follow the
+    # pandas rules: float columns keep their dtype, capped integer columns are upcast to
+    # Float64 unless every capped value is a whole number.
+    if method != "iqr":
+        return lf
+
+    columns = [c for c in columns if c in lf.columns]
+    if not columns:
+        return lf
+    schema = lf.schema
+
+    if action == "cap":
+        bounds = _iqr_bounds(lf, columns, threshold)
+        if not bounds:
+            return lf
+        counts = lf.select(
+            [(pl.col(c) < lo).sum().alias(f"{c}__low") for c, (lo, hi) in bounds.items()]
+            + [(pl.col(c) > hi).sum().alias(f"{c}__high") for c, (lo, hi) in bounds.items()]
+        ).collect().row(0, named=True)
+
+        exprs = []
+        for c, (lower, upper) in bounds.items():
+            low, high = counts[f"{c}__low"], counts[f"{c}__high"]
+            if low + high == 0:
+                continue
+            lossless = (low == 0 or float(lower).is_integer()) and (high == 0 or float(upper).is_integer())
+            if schema[c].is_float():
+                target = schema[c]
+            else:
+                target = schema[c] if lossless else pl.Float64
+            exprs.append(pl.col(c).cast(pl.Float64).clip(lower, upper).cast(target))
+            logger.info(f"{c}: capped/removed {low + high} outliers (method={method})")
+        return lf.with_columns(exprs) if exprs else lf
+
+    elif action == "remove":
+        # Removal shrinks the frame, so each column's bounds come from the already-filtered data
+        for c in columns:
+            bounds = _iqr_bounds(lf, [c], threshold)
+            if c not in bounds:
+                continue
+            lower, upper = bounds[c]
+            # Nulls are neither below nor above the bounds → kept, as in the pandas mask
+            lf = lf.filter(pl.col(c).is_between(lower, upper) | pl.col(c).is_null())
+    return lf
+
+
+def feature_engineering(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # Polars expressions mirroring preprocess.feature_engineering.
+    cols = lf.columns
+    exprs = []
+
+    # 1. Age grouping + ordinal encoding (number of breaks passed)
+    if "Age" in cols:
+        # Bins span [0, 100): ages outside it get a null group and ordinal -1, like pandas
+        in_range = (pl.col("Age") >= 0) & (pl.col("Age") < 100)
+        exprs.append(
+            pl.when(in_range).then(pl.col("Age"))
+            .cut(AGE_BREAKS, labels=AGE_LABELS, left_closed=True)
+            .alias("Age_Group")
+        )
+        exprs.append(
+            pl.when(in_range)
+            .then(pl.sum_horizontal([(pl.col("Age") >= b).cast(pl.Int8) for b in AGE_BREAKS]))
+            .otherwise(-1)
+            .cast(pl.Int8)
+            .alias("Age_Group_Ordinal")
+        )
+
+    # 2. Purchase value categories
+    if "Purchase Amount (USD)" in cols:
+        exprs.append(
+            pl.col("Purchase Amount (USD)")
+            .cut(PURCHASE_BREAKS, labels=PURCHASE_LABELS)
+            .alias("Purchase_Category")
+        )
+
+    # 3. Discount & Promo interaction
+    if all(col in cols for col in ["Discount Applied", "Promo Code Used"]):
+        exprs.append(
+            pl.when((pl.col("Discount Applied") == "Yes") | (pl.col("Promo Code Used") == "Yes"))
+            .then(pl.lit("Yes"))
+            .otherwise(pl.lit("No"))
+            .cast(pl.Categorical)
+            .alias("Discount_or_Promo")
+        )
+
+    # 4. Loyalty / recency proxy
+    if "Previous Purchases" in cols:
+        exprs.append(
+            (pl.col("Previous Purchases") >= 10).fill_null(False).cast(pl.Int8).alias("Is_Repeat_Customer")
+        )
+
+    # 5. Season + Category interaction (popular combos)
+    if all(col in cols for col in ["Season", "Category"]):
+        exprs.append(
+            pl.concat_str([pl.col("Season"), pl.col("Category")], separator="_")
+            .cast(pl.Categorical)
+            .alias("Season_Category")
+        )
+
+    return lf.with_columns(exprs)
+
+
+def preprocess_pipeline(
+    file_path: str,
+    handle_outliers: bool = True,
+    outlier_method: str = "iqr",
+    to_pandas: bool = True
+) -> Union[pd.DataFrame, pl.DataFrame]:
+    # One lazy query executed by the streaming engine; only the small null-count and
+    # quartile aggregates that decide output dtypes are collected ahead of it.
+    logger.info("Starting Polars preprocessing pipeline...")
+
+    lf = clean_data(scan_data(file_path))
+
+    if handle_outliers:
+        numeric_to_check = ["Purchase Amount (USD)", "Previous Purchases", "Age", "Review Rating"]
+        lf = detect_and_handle_outliers(lf, numeric_to_check, method=outlier_method)
+
+    df = feature_engineering(lf).collect(streaming=True)
+    logger.info(f"Preprocessing complete. Final shape: {df.shape}")
+
+    # Convert only at the boundary, for the pandas / matplotlib plotting code
+    if to_pandas:
+        return df.to_pandas(use_pyarrow_extension_array=True)
+    return df
+
+
+if __name__ == "__main__":
+    FILE = "C:\\Users\\Hemant\\Desktop\\Shopping Behavior\\Dataset\\shopping_behavior.csv"
+
+    processed = preprocess_pipeline(FILE, handle_outliers=True)
+
+    print(processed.head())
+    print("\nColumns after preprocessing:")
+    print(processed.columns.tolist())